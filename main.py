@@ -1,11 +1,15 @@
 import streamlit as st
 import base64
+import hashlib
+import hmac
+import io
+import time
 from supabase import create_client
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Tuple
-import plotly.express as px
-import plotly.graph_objects as go
+# plotly é importado dentro das funções de gráfico: login e início não pagam o import
 
 # -------------------
 # Configuração inicial
@@ -15,15 +19,33 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Copy-on-Write: seleções e renomeações não copiam colunas até serem alteradas
+# (já é o padrão a partir do pandas 3.0, onde a opção foi descontinuada)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # Constantes
 SETORES_PADRAO = ["Hemodiálise", "Lavanderia", "Instrumentais Cirúrgicos", "Emergência"]
+OPCOES_SETOR = SETORES_PADRAO + ["Outro"]
 TIPOS_MANUTENCAO = ["Preventiva", "Corretiva", "Urgente"]
+LINHAS_POR_PAGINA = 100
+COLUNAS_CATEGORICAS = ("status", "setor", "tipo")
+# Projeções enviadas ao Supabase: só as colunas que as páginas usam
+# (descricao/resolucao, texto longo, só entram nas consultas das seções que os exibem)
+COLUNAS_EQUIPAMENTOS = "id, nome, setor, numero_serie, status"
+COLUNAS_MANUTENCOES = "id, equipamento_id, tipo, status, data_inicio, data_fim, equipamentos(nome, setor)"
+COLUNAS_MANUTENCOES_TEXTOS = COLUNAS_MANUTENCOES + ", descricao, resolucao"
 
 # -------------------
 # Sistema de Login
 # -------------------
 ADMIN_EMAIL = st.secrets["login"]["email"]
-ADMIN_PASSWORD = st.secrets["login"]["password"]
+MAX_TENTATIVAS_LOGIN = 3  # a partir daqui cada falha bloqueia por mais 60s
+
+@st.cache_resource
+def admin_password_hash() -> str:
+    """SHA-256 da senha do admin, calculado uma vez por processo (o script roda de novo a cada rerun)"""
+    return hashlib.sha256(st.secrets["login"]["password"].encode()).hexdigest()
 
 def login():
     st.title("Sistema HSC - Login")
@@ -35,15 +57,24 @@ def login():
         submitted = st.form_submit_button("🔐 Entrar", use_container_width=True)
     
     if submitted:
-        if not email or not senha:
+        restante = st.session_state.get("block_until", 0) - time.monotonic()
+        if restante > 0:
+            st.error(f"🔒 Muitas tentativas inválidas. Tente novamente em {int(restante) + 1}s.")
+        elif not email or not senha:
             st.error("❌ Preencha todos os campos.")
-        elif email == ADMIN_EMAIL and senha == ADMIN_PASSWORD:
+        elif email == ADMIN_EMAIL and hmac.compare_digest(hashlib.sha256(senha.encode()).hexdigest(), admin_password_hash()):
             st.success("✅ Login realizado com sucesso!")
+            st.session_state.pop("failed_attempts", None)
+            st.session_state.pop("block_until", None)
             st.session_state["user"] = email
             st.session_state["login_time"] = datetime.now()
             st.balloons()
             st.rerun()
         else:
+            tentativas = st.session_state.get("failed_attempts", 0) + 1
+            st.session_state["failed_attempts"] = tentativas
+            if tentativas >= MAX_TENTATIVAS_LOGIN:
+                st.session_state["block_until"] = time.monotonic() + 60 * (tentativas - MAX_TENTATIVAS_LOGIN + 1)
             st.error("❌ Email ou senha incorretos.")
 
 def check_session():
@@ -78,13 +109,18 @@ def init_supabase():
         st.error(f"❌ Erro ao conectar com o banco: {e}")
         return None
 
-@st.cache_data(ttl=600)  # 10 minutos (logo não muda)
-def load_logo():
+@st.cache_resource  # logo não muda: HTML montado uma vez por processo
+def logo_html() -> str:
     try:
         with open("logo.png", "rb") as f:
-            return base64.b64encode(f.read()).decode()
+            encoded_logo = base64.b64encode(f.read()).decode()
     except FileNotFoundError:
-        return None
+        return ""
+    return f"""
+            <div style="text-align: center;">
+                <img src="data:image/png;base64,{encoded_logo}" width="120">
+            </div>
+            """
 
 # -------------------
 # Funções de banco com cache
@@ -93,7 +129,7 @@ def load_logo():
 def fetch_equipamentos_cached(_supabase) -> List[Dict]:
     """Cache de 1 minuto para equipamentos"""
     try:
-        response = _supabase.table("equipamentos").select("*").execute()
+        response = _supabase.table("equipamentos").select(COLUNAS_EQUIPAMENTOS).execute()
         return response.data if response.data else []
     except Exception as e:
         st.error(f"❌ Erro ao carregar equipamentos: {e}")
@@ -103,55 +139,127 @@ def fetch_equipamentos_cached(_supabase) -> List[Dict]:
 def fetch_manutencoes_cached(_supabase) -> List[Dict]:
     """Cache de 1 minuto para manutenções"""
     try:
-        response = _supabase.table("manutencoes").select("*").execute()
+        response = _supabase.table("manutencoes").select(COLUNAS_MANUTENCOES).execute()
+        return response.data if response.data else []
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar manutenções: {e}")
+        return []
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_equipamentos_por_status_cached(_supabase, status: str) -> List[Dict]:
+    """Cache de 1 minuto para equipamentos filtrados por status no servidor"""
+    try:
+        response = _supabase.table("equipamentos").select(COLUNAS_EQUIPAMENTOS).eq("status", status).execute()
+        return response.data if response.data else []
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar equipamentos: {e}")
+        return []
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_manutencoes_por_status_cached(_supabase, status: str) -> List[Dict]:
+    """Cache de 30 segundos para manutenções filtradas por status no servidor"""
+    try:
+        response = _supabase.table("manutencoes").select(COLUNAS_MANUTENCOES + ", descricao").eq("status", status).execute()
+        return response.data if response.data else []
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar manutenções: {e}")
+        return []
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_historico_manutencoes_cached(_supabase) -> List[Dict]:
+    """Cache de 1 minuto para manutenções com descrição/resolução (só os relatórios usam)"""
+    try:
+        response = _supabase.table("manutencoes").select(COLUNAS_MANUTENCOES_TEXTOS).execute()
         return response.data if response.data else []
     except Exception as e:
         st.error(f"❌ Erro ao carregar manutenções: {e}")
         return []
 
+@st.cache_data(ttl=60, show_spinner=False)
+def opcoes_equipamentos_ativos(_supabase) -> Dict[str, int]:
+    """Mapa 'nome - setor' → id dos equipamentos ativos (cache de 1 minuto)"""
+    return {f"{e['nome']} - {e['setor']}": e['id']
+            for e in fetch_equipamentos_por_status_cached(_supabase, "Ativo")}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def indice_busca_equipamentos(_supabase) -> pd.DataFrame:
+    """Equipamentos com o texto de busca (nome, setor, série) já em minúsculas (cache de 1 minuto)"""
+    df = pd.DataFrame(fetch_equipamentos_cached(_supabase))
+    if not df.empty:
+        # na_rep: um campo nulo não pode anular o texto inteiro (e esconder o equipamento da busca)
+        df['_busca'] = df['nome'].str.cat([df['setor'], df['numero_serie']], sep='\n', na_rep='').str.lower()
+    return df
+
 def clear_cache():
     """Limpa todos os caches de dados"""
     fetch_equipamentos_cached.clear()
     fetch_manutencoes_cached.clear()
+    fetch_equipamentos_por_status_cached.clear()
+    fetch_manutencoes_por_status_cached.clear()
+    fetch_historico_manutencoes_cached.clear()
+    opcoes_equipamentos_ativos.clear()
+    indice_busca_equipamentos.clear()
+    preparar_dataframes.clear()
+    preparar_manutencoes_abertas.clear()
+    preparar_historico_manutencoes.clear()
+    gerar_alertas.clear()
+    preparar_dados_dashboard.clear()
 
 # -------------------
 # Funções auxiliares otimizadas
 # -------------------
-def preparar_dataframes(supabase) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    """Carrega e prepara DataFrames com conversões de tipo otimizadas"""
-    df_equip = pd.DataFrame(fetch_equipamentos_cached(supabase))
-    df_manut = pd.DataFrame(fetch_manutencoes_cached(supabase))
-    
-    # Converter datas uma única vez
-    if not df_manut.empty and 'data_inicio' in df_manut.columns:
-        df_manut['data_inicio'] = pd.to_datetime(df_manut['data_inicio'], errors='coerce')
-        if 'data_fim' in df_manut.columns:
-            df_manut['data_fim'] = pd.to_datetime(df_manut['data_fim'], errors='coerce')
+@st.cache_data(ttl=60, show_spinner=False)
+def preparar_dataframes(_supabase) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Carrega e prepara DataFrames com conversões de tipo otimizadas (cache de 1 minuto)"""
+    df_equip = converter_tipos(pd.DataFrame(fetch_equipamentos_cached(_supabase)))
+    # Nome/setor do equipamento já vêm embutidos na mesma consulta (embed do PostgREST)
+    df_manut = converter_tipos(achatar_embed_equipamento(pd.DataFrame(fetch_manutencoes_cached(_supabase))))
     
     return df_equip, df_manut
 
-def adicionar_info_equipamentos(df_manut: pd.DataFrame, df_equip: pd.DataFrame) -> pd.DataFrame:
-    """Adiciona informações de equipamentos usando merge (vetorizado)"""
-    if df_manut.empty or df_equip.empty:
+@st.cache_data(ttl=30, show_spinner=False)
+def preparar_manutencoes_abertas(_supabase) -> pd.DataFrame:
+    """Manutenções em andamento (filtradas no servidor) com nome/setor do equipamento"""
+    df_abertas = pd.DataFrame(fetch_manutencoes_por_status_cached(_supabase, "Em andamento"))
+    return converter_tipos(achatar_embed_equipamento(df_abertas))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def preparar_historico_manutencoes(_supabase) -> pd.DataFrame:
+    """Manutenções com nome/setor do equipamento e os textos longos, numa única consulta"""
+    df_hist = pd.DataFrame(fetch_historico_manutencoes_cached(_supabase))
+    return converter_tipos(achatar_embed_equipamento(df_hist))
+
+def converter_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte datas ISO-8601 e colunas de baixa cardinalidade para category"""
+    # Converter datas uma única vez (Supabase devolve ISO-8601, parser vetorizado)
+    if not df.empty and 'data_inicio' in df.columns:
+        df['data_inicio'] = pd.to_datetime(df['data_inicio'], format='ISO8601', errors='coerce')
+        if 'data_fim' in df.columns:
+            df['data_fim'] = pd.to_datetime(df['data_fim'], format='ISO8601', errors='coerce')
+    
+    # Colunas de baixa cardinalidade como category (códigos inteiros + dicionário)
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    return df
+
+def achatar_embed_equipamento(df_manut: pd.DataFrame) -> pd.DataFrame:
+    """Achata o embed equipamentos(nome, setor) em colunas (vetorizado, sem merge)"""
+    if df_manut.empty or 'equipamentos' not in df_manut.columns:
         return df_manut
     
-    return df_manut.merge(
-        df_equip[['id', 'nome', 'setor']], 
-        left_on='equipamento_id', 
-        right_on='id', 
-        how='left',
-        suffixes=('', '_equip')
-    ).rename(columns={'nome': 'equipamento'}).drop(columns=['id_equip'], errors='ignore')
+    info = df_manut.pop('equipamentos')
+    df_manut['equipamento'] = info.str.get('nome')
+    df_manut['setor'] = info.str.get('setor')
+    return df_manut
 
 def calcular_tempo_parada_vetorizado(df: pd.DataFrame) -> pd.DataFrame:
     """Calcula tempo de parada usando operações vetorizadas do Pandas"""
     if df.empty:
         return df
     
-    # Garantir que datas estão no formato correto
-    df['data_inicio'] = pd.to_datetime(df['data_inicio'], errors='coerce')
-    df['data_fim'] = pd.to_datetime(df['data_fim'], errors='coerce')
-    
+    # Datas já chegam como datetime64 (convertidas em preparar_dataframes).
     # Usar data_fim se existe, senão usar now()
     df['data_fim_calc'] = df['data_fim'].fillna(pd.Timestamp.now())
     
@@ -162,41 +270,66 @@ def calcular_tempo_parada_vetorizado(df: pd.DataFrame) -> pd.DataFrame:
     df['tempo_parada_horas'] = delta.dt.total_seconds() / 3600
     
     # Formatar string de tempo
-    dias = delta.dt.days
-    segundos_restantes = delta.dt.seconds
+    dias = delta.dt.days.fillna(0).astype(int)
+    segundos_restantes = delta.dt.seconds.fillna(0).astype(int)
     horas = segundos_restantes // 3600
     minutos = (segundos_restantes % 3600) // 60
     
-    # Criar strings formatadas condicionalmente
-    def formatar_tempo(d, h, m):
-        if d > 0:
-            return f"{d}d {h}h {m}min"
-        elif h > 0:
-            return f"{h}h {m}min"
-        else:
-            return f"{m}min"
-    
-    df['tempo_parada'] = [formatar_tempo(d, h, m) for d, h, m in zip(dias, horas, minutos)]
+    # Criar strings formatadas condicionalmente (concatenação vetorizada, sem função por linha)
+    txt_min = minutos.astype(str) + "min"
+    txt_horas = horas.astype(str) + "h " + txt_min
+    df['tempo_parada'] = np.select(
+        [dias > 0, horas > 0],
+        [dias.astype(str) + "d " + txt_horas, txt_horas],
+        default=txt_min
+    )
     
     # Limpar coluna temporária
     df.drop(columns=['data_fim_calc'], inplace=True, errors='ignore')
     
     return df
 
+@st.cache_data(ttl=300, show_spinner=False, max_entries=8)
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """Serializa o CSV em blocos direto para bytes (cache de 5 minutos)"""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, chunksize=5000, encoding='utf-8')
+    return buffer.getvalue()
+
+# -------------------
+# Gráficos
+# -------------------
+def figura_barras(df: pd.DataFrame, x: str, y: str, title: str, color: Optional[str] = None,
+                  range_color: Optional[Tuple[float, float]] = None, meta: Optional[float] = None):
+    """Monta o gráfico de barras com go.Bar direto (sem o pipeline de validação do px)"""
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Bar(x=df[x].to_numpy(), y=df[y].to_numpy()))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    if color is not None:
+        # Escala contínua via coloraxis, como no px (usa a escala sequencial do tema)
+        fig.update_traces(marker=dict(color=df[color].to_numpy(), coloraxis='coloraxis'))
+        fig.update_layout(coloraxis=dict(colorbar=dict(title=dict(text=color))))
+        if range_color is not None:
+            fig.update_layout(coloraxis=dict(cmin=range_color[0], cmax=range_color[1]))
+    if meta is not None:
+        fig.add_hline(y=meta, line_dash="dash", line_color="red", 
+                      annotation_text=f"Meta: {meta}%")
+    return fig
+
+def figura_linha(df: pd.DataFrame, x: str, y: str, title: str):
+    """Monta o gráfico de linha em WebGL (Scattergl)"""
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Scattergl(x=df[x].to_numpy(), y=df[y].to_numpy(), mode='lines'))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
 # -------------------
 # Sidebar
 # -------------------
 def show_sidebar():
-    encoded_logo = load_logo()
-    if encoded_logo:
-        st.sidebar.markdown(
-            f"""
-            <div style="text-align: center;">
-                <img src="data:image/png;base64,{encoded_logo}" width="120">
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    logo = logo_html()
+    if logo:
+        st.sidebar.markdown(logo, unsafe_allow_html=True)
         
     st.sidebar.markdown("---")
     
@@ -234,34 +367,28 @@ def insert_equipment(supabase, nome: str, setor: str, numero_serie: str) -> bool
 
 def start_maintenance(supabase, equipamento_id: int, tipo: str, descricao: str) -> bool:
     try:
-        manut_response = supabase.table("manutencoes").insert({
-            "equipamento_id": equipamento_id,
-            "tipo": tipo,
-            "descricao": descricao.strip(),
-            "data_inicio": datetime.now().isoformat(),
-            "status": "Em andamento"
+        # Insert da manutenção + status do equipamento numa única RPC (ver README)
+        response = supabase.rpc("start_maintenance", {
+            "p_equipamento_id": equipamento_id,
+            "p_tipo": tipo,
+            "p_descricao": descricao.strip(),
+            "p_data_inicio": datetime.now().isoformat()
         }).execute()
-        
-        if manut_response.data:
-            supabase.table("equipamentos").update({"status": "Em manutenção"}).eq("id", equipamento_id).execute()
-            return True
-        return False
+        return bool(response.data)
     except Exception as e:
         st.error(f"❌ Erro ao abrir manutenção: {e}")
         return False
 
 def finish_maintenance(supabase, manut_id: int, equipamento_id: int, resolucao: str) -> bool:
     try:
-        manut_response = supabase.table("manutencoes").update({
-            "data_fim": datetime.now().isoformat(),
-            "status": "Concluída",
-            "resolucao": resolucao.strip()
-        }).eq("id", manut_id).execute()
-        
-        if manut_response.data:
-            supabase.table("equipamentos").update({"status": "Ativo"}).eq("id", equipamento_id).execute()
-            return True
-        return False
+        # Conclusão da manutenção + equipamento de volta a Ativo numa única RPC (ver README)
+        response = supabase.rpc("finish_maintenance", {
+            "p_manut_id": manut_id,
+            "p_equipamento_id": equipamento_id,
+            "p_resolucao": resolucao.strip(),
+            "p_data_fim": datetime.now().isoformat()
+        }).execute()
+        return bool(response.data)
     except Exception as e:
         st.error(f"❌ Erro ao finalizar manutenção: {e}")
         return False
@@ -269,51 +396,57 @@ def finish_maintenance(supabase, manut_id: int, equipamento_id: int, resolucao:
 # -------------------
 # Sistema de alertas otimizado
 # -------------------
+@st.cache_data(ttl=60, show_spinner=False)
 def gerar_alertas(df_equip: pd.DataFrame, df_manut: pd.DataFrame) -> Tuple[List[str], List[str], List[str]]:
     if df_equip.empty or df_manut.empty:
         return [], [], []
     
     alertas_criticos, alertas_importantes, alertas_info = [], [], []
+    agora = datetime.now()
     
-    # 1. Equipamentos com muitas manutenções (4+ em 3 meses) - vetorizado
-    tres_meses = datetime.now() - timedelta(days=90)
-    manut_3m = df_manut[df_manut['data_inicio'] >= tres_meses]
-    problem_equip = manut_3m.groupby('equipamento_id').size()
+    # Máscaras calculadas uma única vez e reaproveitadas pelas regras abaixo
+    ids_manut = df_manut['equipamento_id']
+    data_inicio = df_manut['data_inicio']
+    m3 = data_inicio >= agora - timedelta(days=90)
+    m6 = data_inicio >= agora - timedelta(days=180)
+    is_urg = df_manut['tipo'] == 'Urgente'
+    is_prev = df_manut['tipo'] == 'Preventiva'
+    is_open = df_manut['status'] == 'Em andamento'
     
     # Criar lookup dict para nomes (mais rápido que .values)
     equip_dict = df_equip.set_index('id')['nome'].to_dict()
     
-    for eq_id, qtd in problem_equip.items():
+    # 1. Equipamentos com muitas manutenções (4+ em 3 meses) - vetorizado
+    for eq_id, qtd in ids_manut[m3].value_counts(sort=False).items():
         if qtd >= 4 and eq_id in equip_dict:
             alertas_criticos.append(f"🚨 **{equip_dict[eq_id]}** teve {qtd} manutenções em 3 meses")
     
     # 2. Manutenções urgentes recorrentes
-    urgentes_por_equip = df_manut[df_manut['tipo'] == 'Urgente'].groupby('equipamento_id').size()
-    for eq_id, qtd in urgentes_por_equip.items():
+    for eq_id, qtd in ids_manut[is_urg].value_counts(sort=False).items():
         if qtd >= 2 and eq_id in equip_dict:
             alertas_criticos.append(f"🚨 **{equip_dict[eq_id]}** teve {qtd} manutenções urgentes")
     
-    # 3. Manutenções longas (mais de 7 dias)
-    em_andamento = df_manut[df_manut['status'] == 'Em andamento'].copy()
-    if not em_andamento.empty:
-        em_andamento['dias'] = (datetime.now() - em_andamento['data_inicio']).dt.days
-        longas = em_andamento[em_andamento['dias'] > 7]
-        for _, row in longas.iterrows():
-            if row['equipamento_id'] in equip_dict:
-                alertas_criticos.append(f"🚨 **{equip_dict[row['equipamento_id']]}** em manutenção há {row['dias']} dias")
+    # 3. Manutenções longas (mais de 7 dias) - dias e nomes vetorizados, sem iterrows
+    dias = (agora - data_inicio[is_open]).dt.days
+    nomes = ids_manut[is_open].map(equip_dict)
+    longas = (dias > 7) & nomes.notna()
+    alertas_criticos.extend(
+        f"🚨 **{nome}** em manutenção há {d} dias"
+        for nome, d in zip(nomes[longas].tolist(), dias[longas].astype(int).tolist())
+    )
     
     # 4. Baixa disponibilidade por setor
-    dispo_setor = df_equip.groupby('setor')['status'].apply(lambda x: (x == 'Ativo').sum() / len(x) * 100)
-    for setor, dispo in dispo_setor.items():
-        if dispo < 75:
-            alertas_importantes.append(f"⚠️ **{setor}**: {dispo:.1f}% de disponibilidade")
+    dispo_setor = df_equip['status'].eq('Ativo').groupby(df_equip['setor'], observed=True).mean() * 100
+    for setor, dispo in dispo_setor[dispo_setor < 75].items():
+        alertas_importantes.append(f"⚠️ **{setor}**: {dispo:.1f}% de disponibilidade")
     
     # 5. Sem manutenção preventiva há muito tempo
-    seis_meses = datetime.now() - timedelta(days=180)
-    preventivas_6m = df_manut[(df_manut['tipo'] == 'Preventiva') & (df_manut['data_inicio'] >= seis_meses)]['equipamento_id'].unique()
-    sem_preventiva = df_equip[(~df_equip['id'].isin(preventivas_6m)) & (df_equip['status'] == 'Ativo')]
-    for _, row in sem_preventiva.head(5).iterrows():
-        alertas_info.append(f"💡 **{row['nome']}** sem manutenção preventiva há 6+ meses")
+    # Ids direto do array numpy para um set (sem DataFrame intermediário nem ordenação)
+    preventivas_6m = set(ids_manut.to_numpy()[(is_prev & m6).to_numpy()].tolist())
+    ativos = df_equip.loc[df_equip['status'] == 'Ativo', ['id', 'nome']]
+    sem_preventiva = ativos.loc[~ativos['id'].isin(preventivas_6m), 'nome']
+    for nome in sem_preventiva.head(5):
+        alertas_info.append(f"💡 **{nome}** sem manutenção preventiva há 6+ meses")
     
     return alertas_criticos, alertas_importantes, alertas_info
 
@@ -321,9 +454,11 @@ def calcular_metricas(df_equip: pd.DataFrame, df_manut: pd.DataFrame) -> Dict:
     if df_equip.empty:
         return {}
     
+    # Uma única contagem sobre os equipamentos já carregados (mesmo retrato dos gráficos e alertas)
     total = len(df_equip)
-    ativos = (df_equip['status'] == 'Ativo').sum()
-    manutencao = (df_equip['status'] == 'Em manutenção').sum()
+    status_counts = df_equip['status'].value_counts()
+    ativos = int(status_counts.get('Ativo', 0))
+    manutencao = int(status_counts.get('Em manutenção', 0))
     disponibilidade = (ativos / total * 100) if total > 0 else 0
     
     # Manutenções último mês
@@ -338,6 +473,70 @@ def calcular_metricas(df_equip: pd.DataFrame, df_manut: pd.DataFrame) -> Dict:
         'disponibilidade': disponibilidade, 'manut_mes': manut_mes
     }
 
+@st.cache_data(ttl=300, show_spinner=False, max_entries=8)
+def preparar_dados_dashboard(df_equip: pd.DataFrame, df_manut: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Agregações do dashboard em cache (5 minutos), recalculadas só quando os dados mudam"""
+    vazio = pd.DataFrame()
+    frames = {'tipo_counts': vazio, 'manut_mensal': vazio,
+              'tempo_por_tipo': vazio, 'tempo_por_setor': vazio, 'tempo_por_equip': vazio}
+    
+    # Resumo por setor: uma agregação nomeada (sem lambdas) sobre a máscara de ativos
+    resumo_setor = df_equip['status'].eq('Ativo').groupby(df_equip['setor'], observed=True).agg(
+        Total='size', Ativos='sum'
+    ).reset_index()
+    resumo_setor.columns = ['Setor', 'Total', 'Ativos']
+    disponibilidade = resumo_setor['Ativos'] / resumo_setor['Total'] * 100
+    
+    # Disponibilidade por setor (derivada do mesmo resumo)
+    frames['dispo_setor'] = pd.DataFrame({'Setor': resumo_setor['Setor'], 'Disponibilidade (%)': disponibilidade})
+    
+    resumo_setor['Disponibilidade (%)'] = disponibilidade.round(1)
+    resumo_setor['Em Manutenção'] = resumo_setor['Total'] - resumo_setor['Ativos']
+    frames['resumo_setor'] = resumo_setor
+    
+    if df_manut.empty:
+        return frames
+    
+    # Manutenções por tipo (últimos 6 meses)
+    seis_meses = datetime.now() - timedelta(days=180)
+    df_recente = df_manut[df_manut['data_inicio'] >= seis_meses]
+    if not df_recente.empty:
+        tipo_counts = df_recente['tipo'].value_counts()
+        tipo_counts = tipo_counts[tipo_counts > 0].reset_index()
+        tipo_counts.columns = ['Tipo', 'Quantidade']
+        frames['tipo_counts'] = tipo_counts
+    
+    # Tendência mensal (sem alterar o df_manut recebido)
+    manut_mensal = df_manut.groupby(df_manut['data_inicio'].dt.to_period('M')).size().reset_index()
+    manut_mensal.columns = ['Mês', 'Quantidade']
+    manut_mensal['Mês'] = manut_mensal['Mês'].astype(str)
+    frames['manut_mensal'] = manut_mensal
+    
+    # Tempo de parada (apenas manutenções concluídas)
+    df_manut_completo = calcular_tempo_parada_vetorizado(df_manut.copy(deep=False))
+    df_concluidas = df_manut_completo[df_manut_completo['status'] == 'Concluída']
+    if df_concluidas.empty:
+        return frames
+    
+    tempo_por_tipo = df_concluidas.groupby('tipo', observed=True)['tempo_parada_horas'].mean().reset_index()
+    tempo_por_tipo.columns = ['Tipo', 'Tempo Médio (horas)']
+    tempo_por_tipo['Tempo Médio (horas)'] = tempo_por_tipo['Tempo Médio (horas)'].round(1)
+    frames['tempo_por_tipo'] = tempo_por_tipo
+    
+    if 'setor' in df_concluidas.columns:
+        tempo_por_setor = df_concluidas.groupby('setor', observed=True)['tempo_parada_horas'].mean().reset_index()
+        tempo_por_setor.columns = ['Setor', 'Tempo Médio (horas)']
+        tempo_por_setor['Tempo Médio (horas)'] = tempo_por_setor['Tempo Médio (horas)'].round(1)
+        frames['tempo_por_setor'] = tempo_por_setor
+    
+    tempo_por_equip = df_concluidas.groupby('equipamento')['tempo_parada_horas'].sum().reset_index()
+    tempo_por_equip.columns = ['Equipamento', 'Tempo Total (horas)']
+    tempo_por_equip = tempo_por_equip.sort_values('Tempo Total (horas)', ascending=False).head(5)
+    tempo_por_equip['Tempo Total (horas)'] = tempo_por_equip['Tempo Total (horas)'].round(1)
+    frames['tempo_por_equip'] = tempo_por_equip
+    
+    return frames
+
 # -------------------
 # Páginas
 # -------------------
@@ -408,15 +607,17 @@ def pagina_inicial(supabase):
 def pagina_equipamentos(supabase):
     st.title("Gestão de Equipamentos")
     
-    tab1, tab2, tab3 = st.tabs(["➕ Cadastrar Novo", "📝 Gerenciar Existentes", "📊 Relatórios"])
+    # Abas via radio: só o corpo da aba selecionada executa (st.tabs roda todas a cada rerun)
+    abas = ["➕ Cadastrar Novo", "📝 Gerenciar Existentes", "📊 Relatórios"]
+    aba = st.radio("Seção", abas, horizontal=True, key="aba_equipamentos", label_visibility="collapsed")
     
     # Tab 1 - Cadastrar
-    with tab1:
+    if aba == abas[0]:
         st.subheader("Cadastrar Novo Equipamento")
         
         with st.form("cadastro_equip", clear_on_submit=True):
             nome = st.text_input("Nome do Equipamento")
-            setor = st.selectbox("Setor", SETORES_PADRAO + ["Outro"])
+            setor = st.selectbox("Setor", OPCOES_SETOR)
             numero_serie = st.text_input("Número de Série")
     
             if setor == "Outro":
@@ -437,18 +638,21 @@ def pagina_equipamentos(supabase):
                         st.rerun()
     
     # Tab 2 - Gerenciar
-    with tab2:
+    if aba == abas[1]:
         st.subheader("Gerenciar Equipamentos Existentes")
 
         equipamentos = fetch_equipamentos_cached(supabase)
         if equipamentos:
-            busca = st.text_input("🔍 Buscar equipamento", placeholder="Digite nome ou setor...")
+            # Form: a busca só dispara rerun ao enviar, não a cada tecla
+            with st.form("busca_equip"):
+                busca = st.text_input("🔍 Buscar equipamento", placeholder="Digite nome ou setor...")
+                st.form_submit_button("Buscar")
 
             if busca:
-                equipamentos = [e for e in equipamentos if 
-                               busca.lower() in e['nome'].lower() or 
-                               busca.lower() in e['setor'].lower() or 
-                               busca.lower() in e['numero_serie'].lower()]
+                # Filtro vetorizado sobre o índice já em minúsculas (lower só do termo)
+                df_busca = indice_busca_equipamentos(supabase)
+                mask = df_busca['_busca'].str.contains(busca.lower(), regex=False, na=False)
+                equipamentos = df_busca[mask].drop(columns='_busca').to_dict('records')
 
             if equipamentos:
                 equip_options = []
@@ -481,16 +685,17 @@ def pagina_equipamentos(supabase):
                             st.info("⚠️ Este equipamento já está inativo.")
 
     # Tab 3 - Relatórios
-    with tab3:
+    if aba == abas[2]:
         st.subheader("Relatórios de Equipamentos")
         
         df_equip, _ = preparar_dataframes(supabase)
         if not df_equip.empty:
-            # Métricas
+            # Métricas e gráfico de status saem da mesma contagem
+            status_counts = df_equip['status'].value_counts()
             col1, col2, col3 = st.columns(3)
             col1.metric("Total", len(df_equip))
-            col2.metric("Ativos", (df_equip['status'] == 'Ativo').sum())
-            col3.metric("Em Manutenção", (df_equip['status'] == 'Em manutenção').sum())
+            col2.metric("Ativos", int(status_counts.get('Ativo', 0)))
+            col3.metric("Em Manutenção", int(status_counts.get('Em manutenção', 0)))
             
             # Gráficos
             col_g1, col_g2 = st.columns(2)
@@ -498,15 +703,15 @@ def pagina_equipamentos(supabase):
             with col_g1:
                 setor_counts = df_equip['setor'].value_counts().reset_index()
                 setor_counts.columns = ['Setor', 'Quantidade']
-                fig1 = px.bar(setor_counts, x='Setor', y='Quantidade', 
-                              title="Equipamentos por Setor")
+                fig1 = figura_barras(setor_counts, x='Setor', y='Quantidade', 
+                                     title="Equipamentos por Setor")
                 st.plotly_chart(fig1, use_container_width=True)
             
             with col_g2:
-                status_counts = df_equip['status'].value_counts().reset_index()
+                status_counts = status_counts.reset_index()
                 status_counts.columns = ['Status', 'Quantidade']
-                fig2 = px.bar(status_counts, x='Status', y='Quantidade', 
-                              title="Equipamentos por Status")
+                fig2 = figura_barras(status_counts, x='Status', y='Quantidade', 
+                                     title="Equipamentos por Status")
                 st.plotly_chart(fig2, use_container_width=True)
             
             # Tabela
@@ -514,27 +719,28 @@ def pagina_equipamentos(supabase):
             st.dataframe(df_equip[['nome', 'setor', 'numero_serie', 'status']], use_container_width=True, hide_index=True)
             
             # Export
-            csv = df_equip.to_csv(index=False)
+            csv = to_csv_bytes(df_equip)
             st.download_button("📥 Baixar Relatório CSV", csv, 
                              f"equipamentos_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                             use_container_width=True)
+                             mime="text/csv", use_container_width=True)
 
 def pagina_manutencoes(supabase):
     st.title("Gestão de Manutenções")
+    agora = datetime.now()
     
-    tab1, tab2, tab3 = st.tabs(["🆕 Abrir Manutenção", "✅ Finalizar Manutenção", "📊 Relatórios"])
+    # Abas via radio: só o corpo da aba selecionada executa (st.tabs roda todas a cada rerun)
+    abas = ["🆕 Abrir Manutenção", "✅ Finalizar Manutenção", "📊 Relatórios"]
+    aba = st.radio("Seção", abas, horizontal=True, key="aba_manutencoes", label_visibility="collapsed")
     
     # Tab 1 - Abrir
-    with tab1:
+    if aba == abas[0]:
         st.subheader("Abrir Nova Manutenção")
         
-        equipamentos_ativos = [e for e in fetch_equipamentos_cached(supabase) if e['status'] == "Ativo"]
+        equip_dict = opcoes_equipamentos_ativos(supabase)
         
-        if equipamentos_ativos:
+        if equip_dict:
             with st.form("abrir_manut", clear_on_submit=True):
-                equip_options = [f"{e['nome']} - {e['setor']}" for e in equipamentos_ativos]
-                equip_dict = {opt: equipamentos_ativos[i]['id'] for i, opt in enumerate(equip_options)}
-                equipamento = st.selectbox("Selecionar Equipamento:", equip_options)
+                equipamento = st.selectbox("Selecionar Equipamento:", list(equip_dict))
                 tipo = st.selectbox("Tipo de Manutenção:", TIPOS_MANUTENCAO)
                 descricao = st.text_area("Descrição do Problema:", 
                                            placeholder="Descreva o problema ou serviço necessário...",
@@ -554,24 +760,24 @@ def pagina_manutencoes(supabase):
             st.warning("⚠️ Nenhum equipamento ativo disponível para manutenção.")
     
     # Tab 2 - Finalizar
-    with tab2:
+    if aba == abas[1]:
         st.subheader("Finalizar Manutenções em Andamento")
         
-        df_equip, df_manut = preparar_dataframes(supabase)
-        manutencoes_abertas = df_manut[df_manut['status'] == "Em andamento"]
+        # Só as abertas trafegam (filtro .eq no servidor, não no histórico inteiro)
+        manutencoes_abertas = preparar_manutencoes_abertas(supabase)
         
         if not manutencoes_abertas.empty:
-            # Adicionar info de equipamentos
-            manut_com_equip = adicionar_info_equipamentos(manutencoes_abertas, df_equip)
+            manut_com_equip = manutencoes_abertas
             
             # Calcular dias decorridos
-            manut_com_equip['dias'] = (datetime.now() - manut_com_equip['data_inicio']).dt.days
-            manut_com_equip['status_icon'] = manut_com_equip['dias'].apply(lambda x: "🚨" if x > 7 else "🔧")
+            manut_com_equip['dias'] = (agora - manut_com_equip['data_inicio']).dt.days
+            manut_com_equip['status_icon'] = np.where(manut_com_equip['dias'] > 7, "🚨", "🔧")
             
-            # Criar opções para selectbox
-            manut_com_equip['display'] = manut_com_equip.apply(
-                lambda row: f"{row['status_icon']} {row['equipamento']} | {row['tipo']} | {row['dias']} dias", 
-                axis=1
+            # Criar opções para selectbox (concatenação vetorizada, mais antigas primeiro)
+            manut_com_equip = manut_com_equip.sort_values('dias', ascending=False)
+            manut_com_equip['display'] = (
+                manut_com_equip['status_icon'] + " " + manut_com_equip['equipamento'].fillna('N/A')
+                + " | " + manut_com_equip['tipo'].astype(str) + " | " + manut_com_equip['dias'].astype(str) + " dias"
             )
             
             manut_dict = manut_com_equip.set_index('display').to_dict('index')
@@ -585,7 +791,7 @@ def pagina_manutencoes(supabase):
                 df_temp = calcular_tempo_parada_vetorizado(df_temp)
                 tempo_parada = df_temp['tempo_parada'].iloc[0]
                 
-                data_inicio_fmt = pd.to_datetime(info['data_inicio']).strftime('%d/%m/%Y %H:%M')
+                data_inicio_fmt = info['data_inicio'].strftime('%d/%m/%Y %H:%M')
                 
                 # Exibir informações
                 col_info1, col_info2 = st.columns(2)
@@ -600,7 +806,7 @@ def pagina_manutencoes(supabase):
                     st.warning(f"{tempo_class} **Tempo de Parada**\n\n"
                               f"# {tempo_parada}")
                 
-                st.info(f"**Problema Relatado:** {info.get('descricao', 'Sem descrição')}")
+                st.info(f"**Problema Relatado:** {info['descricao'] if pd.notna(info.get('descricao')) else 'Sem descrição'}")
                 
                 st.markdown("---")
                 st.markdown("### 📝 Descreva o Reparo Realizado")
@@ -629,56 +835,54 @@ def pagina_manutencoes(supabase):
             st.info("ℹ️ Nenhuma manutenção em andamento no momento.")
     
     # Tab 3 - Relatórios
-    with tab3:
+    if aba == abas[2]:
         st.subheader("Relatórios de Manutenções")
         
-        df_equip, df_manut = preparar_dataframes(supabase)
+        # Uma única consulta já traz descrição/resolução para o histórico detalhado
+        df_manut = preparar_historico_manutencoes(supabase)
         
         if not df_manut.empty:
-            # Adicionar informações de equipamentos (vetorizado)
-            df_completo = adicionar_info_equipamentos(df_manut, df_equip)
+            # Métricas direto das contagens de status (não dependem do merge)
+            status_counts = df_manut['status'].value_counts()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Total", len(df_manut))
+            col2.metric("Em Andamento", int(status_counts.get('Em andamento', 0)))
+            col3.metric("Concluídas", int(status_counts.get('Concluída', 0)))
             
             # Calcular tempo de parada (vetorizado)
-            df_completo = calcular_tempo_parada_vetorizado(df_completo)
+            df_completo = calcular_tempo_parada_vetorizado(df_manut)
             
-            # Métricas
-            col1, col2, col3 = st.columns(3)
-            col1.metric("Total", len(df_completo))
-            col2.metric("Em Andamento", (df_completo['status'] == 'Em andamento').sum())
-            col3.metric("Concluídas", (df_completo['status'] == 'Concluída').sum())
+            # Gráficos: uma única contagem tipo × setor alimenta os dois totais
+            if 'setor' in df_completo.columns:
+                contagens = df_completo.groupby(['tipo', 'setor'], observed=True, dropna=False).size()
+                tipo_counts = contagens.groupby(level='tipo', observed=True).sum().sort_values(ascending=False)
+                setor_counts = contagens.groupby(level='setor', observed=True).sum().sort_values(ascending=False)
+            else:
+                tipo_counts = df_completo['tipo'].value_counts()
             
-            # Gráficos
             col_g1, col_g2 = st.columns(2)
 
             with col_g1:
-                tipo_counts = df_completo['tipo'].value_counts().reset_index()
+                tipo_counts = tipo_counts.reset_index()
                 tipo_counts.columns = ['Tipo', 'Quantidade']
-                fig1 = px.bar(tipo_counts, x='Tipo', y='Quantidade', 
-                              title="Manutenções por Tipo")
+                fig1 = figura_barras(tipo_counts, x='Tipo', y='Quantidade', 
+                                     title="Manutenções por Tipo")
                 st.plotly_chart(fig1, use_container_width=True)
 
             with col_g2:
                 if 'setor' in df_completo.columns:
-                    setor_counts = df_completo['setor'].value_counts().reset_index()
+                    setor_counts = setor_counts.reset_index()
                     setor_counts.columns = ['Setor', 'Quantidade']
-                    fig2 = px.bar(setor_counts, x='Setor', y='Quantidade', 
-                                  title="Manutenções por Setor")
+                    fig2 = figura_barras(setor_counts, x='Setor', y='Quantidade', 
+                                         title="Manutenções por Setor")
                     st.plotly_chart(fig2, use_container_width=True)
             
             # Tabela detalhada
             st.subheader("📋 Histórico Completo de Manutenções")
 
-            # Preparar DataFrame para exibição
-            df_display = df_completo.copy()
-
-            # Formatar datas
-            df_display['data_inicio'] = df_display['data_inicio'].dt.strftime('%d/%m/%Y %H:%M')
-            df_display['data_fim'] = df_display['data_fim'].dt.strftime('%d/%m/%Y %H:%M')
-
-            # Selecionar e renomear colunas
-            colunas_exibir = ['equipamento', 'setor', 'tipo', 'status', 'data_inicio', 'data_fim', 'tempo_parada', 'descricao']
-            if 'resolucao' in df_display.columns:
-                colunas_exibir.append('resolucao')
+            # Selecionar e renomear colunas (com Copy-on-Write a seleção não duplica os dados)
+            colunas_exibir = ['equipamento', 'setor', 'tipo', 'status', 'data_inicio', 'data_fim', 'tempo_parada']
+            colunas_exibir += [c for c in ('descricao', 'resolucao') if c in df_completo.columns]
 
             rename_dict = {
                 'equipamento': 'Equipamento',
@@ -692,17 +896,17 @@ def pagina_manutencoes(supabase):
                 'resolucao': 'Solução Aplicada'
             }
 
-            df_display_final = df_display[colunas_exibir].copy()
-            df_display_final = df_display_final.rename(columns=rename_dict)
+            df_display_final = df_completo[colunas_exibir].rename(columns=rename_dict)
 
-            # Preencher valores vazios
-            df_display_final['Data Conclusão'] = df_display_final['Data Conclusão'].fillna('(Em andamento)')
+            # Formatar datas e preencher valores vazios (só estas colunas são materializadas)
+            df_display_final['Data Início'] = df_display_final['Data Início'].dt.strftime('%d/%m/%Y %H:%M')
+            df_display_final['Data Conclusão'] = df_display_final['Data Conclusão'].dt.strftime('%d/%m/%Y %H:%M').fillna('(Em andamento)')
             if 'Solução Aplicada' in df_display_final.columns:
                 df_display_final['Solução Aplicada'] = df_display_final['Solução Aplicada'].fillna('(Em andamento)')
 
             # Métricas de tempo
             col_m1, col_m2, col_m3 = st.columns(3)
-            concluidas = df_display[df_display['status'] == 'Concluída']
+            concluidas = df_completo[df_completo['status'] == 'Concluída']
             if not concluidas.empty:
                 tempo_medio = concluidas['tempo_parada_horas'].mean()
                 tempo_max = concluidas['tempo_parada_horas'].max()
@@ -711,13 +915,19 @@ def pagina_manutencoes(supabase):
                 col_m2.metric("⏱️ Maior Tempo de Parada", f"{tempo_max:.1f}h")
                 col_m3.metric("📊 Total de Horas Paradas", f"{total_horas:.1f}h")
 
-            st.dataframe(df_display_final, use_container_width=True, hide_index=True)
+            # Paginação: envia ao navegador só a página atual (o CSV continua completo)
+            total_paginas = max(1, -(-len(df_display_final) // LINHAS_POR_PAGINA))
+            pagina = 1
+            if total_paginas > 1:
+                pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1, step=1)
+            inicio = (pagina - 1) * LINHAS_POR_PAGINA
+            st.dataframe(df_display_final.iloc[inicio:inicio + LINHAS_POR_PAGINA], use_container_width=True, hide_index=True)
             
             # Export
-            csv = df_display_final.to_csv(index=False)
+            csv = to_csv_bytes(df_display_final)
             st.download_button("📥 Baixar Relatório Completo CSV", csv, 
-                             f"manutencoes_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                             use_container_width=True)
+                             f"manutencoes_{agora.strftime('%Y%m%d_%H%M')}.csv",
+                             mime="text/csv", use_container_width=True)
         else:
             st.warning("⚠️ Nenhuma manutenção registrada.")
 
@@ -744,18 +954,14 @@ def pagina_dashboard(supabase):
     
     st.markdown("---")
     
+    # Agregações pesadas vêm do cache; aqui fica só o layout
+    frames = preparar_dados_dashboard(df_equip, df_manut)
+    
     # Gráfico principal - Disponibilidade por setor
-    dispo_setor = df_equip.groupby('setor')['status'].apply(
-        lambda x: (x == 'Ativo').sum() / len(x) * 100
-    ).reset_index()
-    dispo_setor.columns = ['Setor', 'Disponibilidade (%)']
-    
-    fig_dispo = px.bar(dispo_setor, x='Setor', y='Disponibilidade (%)', 
-                       title="Disponibilidade por Setor (%)",
-                       color='Disponibilidade (%)',
-                       range_color=[0, 100])
-    fig_dispo.add_hline(y=75, line_dash="dash", line_color="red", 
-                        annotation_text="Meta: 75%")
+    fig_dispo = figura_barras(frames['dispo_setor'], x='Setor', y='Disponibilidade (%)', 
+                              title="Disponibilidade por Setor (%)",
+                              color='Disponibilidade (%)',
+                              range_color=(0, 100), meta=75)
     st.plotly_chart(fig_dispo, use_container_width=True)
     
     # Gráficos complementares
@@ -764,93 +970,54 @@ def pagina_dashboard(supabase):
         
         with col_g1:
             # Manutenções por tipo (últimos 6 meses)
-            seis_meses = datetime.now() - timedelta(days=180)
-            df_recente = df_manut[df_manut['data_inicio'] >= seis_meses]
-            
-            if not df_recente.empty:
-                tipo_counts = df_recente['tipo'].value_counts().reset_index()
-                tipo_counts.columns = ['Tipo', 'Quantidade']
-                fig_tipos = px.bar(tipo_counts, x='Tipo', y='Quantidade', 
-                                   title="Tipos de Manutenção (6 meses)")
+            tipo_counts = frames['tipo_counts']
+            if not tipo_counts.empty:
+                fig_tipos = figura_barras(tipo_counts, x='Tipo', y='Quantidade', 
+                                          title="Tipos de Manutenção (6 meses)")
                 st.plotly_chart(fig_tipos, use_container_width=True)
         
         with col_g2:
             # Tendência mensal
-            df_manut['mes'] = df_manut['data_inicio'].dt.to_period('M')
-            manut_mensal = df_manut.groupby('mes').size().reset_index()
-            manut_mensal.columns = ['Mês', 'Quantidade']
-            manut_mensal['Mês'] = manut_mensal['Mês'].astype(str)
-
+            manut_mensal = frames['manut_mensal']
             if len(manut_mensal) > 1:
-                fig_tendencia = px.line(manut_mensal.tail(12), x='Mês', y='Quantidade', 
-                                        title="Tendência de Manutenções (12 meses)")
+                fig_tendencia = figura_linha(manut_mensal.tail(12), x='Mês', y='Quantidade', 
+                                             title="Tendência de Manutenções (12 meses)")
                 st.plotly_chart(fig_tendencia, use_container_width=True)
     
     # Resumo por setor
     st.markdown("---")
     st.subheader("📋 Resumo por Setor")
     
-    resumo_setor = df_equip.groupby('setor').agg({
-        'id': 'count',
-        'status': lambda x: (x == 'Ativo').sum()
-    }).reset_index()
-    resumo_setor.columns = ['Setor', 'Total', 'Ativos']
-    resumo_setor['Disponibilidade (%)'] = (resumo_setor['Ativos'] / resumo_setor['Total'] * 100).round(1)
-    resumo_setor['Em Manutenção'] = resumo_setor['Total'] - resumo_setor['Ativos']
-    
-    st.dataframe(resumo_setor, use_container_width=True, hide_index=True)
+    st.dataframe(frames['resumo_setor'], use_container_width=True, hide_index=True)
 
     # Análise de tempo de parada
     if not df_manut.empty:
         st.markdown("---")
         st.subheader("⏱️ Análise de Tempo de Parada")
         
-        # Calcular tempos de parada (vetorizado)
-        df_manut_completo = calcular_tempo_parada_vetorizado(df_manut.copy())
-        
-        # Apenas manutenções concluídas
-        df_concluidas = df_manut_completo[df_manut_completo['status'] == 'Concluída'].copy()
-        
-        if not df_concluidas.empty:
-            # Adicionar informações de equipamentos (vetorizado)
-            df_concluidas = adicionar_info_equipamentos(df_concluidas, df_equip)
-            
+        if not frames['tempo_por_tipo'].empty:
             col_t1, col_t2 = st.columns(2)
             
             with col_t1:
-            # Tempo médio por tipo de manutenção 
-                tempo_por_tipo = df_concluidas.groupby('tipo')['tempo_parada_horas'].mean().reset_index() 
-                tempo_por_tipo.columns = ['Tipo', 'Tempo Médio (horas)'] 
-                tempo_por_tipo['Tempo Médio (horas)'] = tempo_por_tipo['Tempo Médio (horas)'].round(1) 
-            
-                fig_tempo_tipo = px.bar(tempo_por_tipo, x='Tipo', y='Tempo Médio (horas)', 
-                title="Tempo Médio de Parada por Tipo", 
-                color='Tempo Médio (horas)') 
-            
+                # Tempo médio por tipo de manutenção
+                fig_tempo_tipo = figura_barras(frames['tempo_por_tipo'], x='Tipo', y='Tempo Médio (horas)', 
+                                               title="Tempo Médio de Parada por Tipo", 
+                                               color='Tempo Médio (horas)') 
                 st.plotly_chart(fig_tempo_tipo, use_container_width=True)
             
             with col_t2:
                 # Tempo médio por setor
-                if 'setor' in df_concluidas.columns:
-                    tempo_por_setor = df_concluidas.groupby('setor')['tempo_parada_horas'].mean().reset_index()
-                    tempo_por_setor.columns = ['Setor', 'Tempo Médio (horas)']
-                    tempo_por_setor['Tempo Médio (horas)'] = tempo_por_setor['Tempo Médio (horas)'].round(1)
-                    
-                    fig_tempo_setor = px.bar(tempo_por_setor, x='Setor', y='Tempo Médio (horas)',
-                                            title="Tempo Médio de Parada por Setor",
-                                            color='Tempo Médio (horas)')
+                if not frames['tempo_por_setor'].empty:
+                    fig_tempo_setor = figura_barras(frames['tempo_por_setor'], x='Setor', y='Tempo Médio (horas)',
+                                                   title="Tempo Médio de Parada por Setor",
+                                                   color='Tempo Médio (horas)')
                     st.plotly_chart(fig_tempo_setor, use_container_width=True)
             
             # Top 5 equipamentos com maior tempo de parada total
             st.subheader("🔴 Equipamentos com Maior Tempo de Parada (Total)")
-            tempo_por_equip = df_concluidas.groupby('equipamento')['tempo_parada_horas'].sum().reset_index()
-            tempo_por_equip.columns = ['Equipamento', 'Tempo Total (horas)']
-            tempo_por_equip = tempo_por_equip.sort_values('Tempo Total (horas)', ascending=False).head(5)
-            tempo_por_equip['Tempo Total (horas)'] = tempo_por_equip['Tempo Total (horas)'].round(1)
-            
-            fig_top_parada = px.bar(tempo_por_equip, x='Equipamento', y='Tempo Total (horas)',
-                                   title="Top 5 Equipamentos - Maior Tempo Parado",
-                                   color='Tempo Total (horas)')
+            fig_top_parada = figura_barras(frames['tempo_por_equip'], x='Equipamento', y='Tempo Total (horas)',
+                                          title="Top 5 Equipamentos - Maior Tempo Parado",
+                                          color='Tempo Total (horas)')
             st.plotly_chart(fig_top_parada, use_container_width=True)
 
 # -------------------